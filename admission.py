@@ -0,0 +1,160 @@
+"""
+Admission control for trace and REST traffic.
+Bounds concurrent work globally and per graph, queues a limited number of
+waiters up to a deadline, and rate-limits individual clients with token buckets.
+"""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+# Cap on retry hints; a bucket that never refills would otherwise suggest infinity
+MAX_RETRY_AFTER = 60.0
+
+class AdmissionRejected(Exception):
+    """Raised when a request is refused; retry_after is a hint in seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = min(retry_after, MAX_RETRY_AFTER) if math.isfinite(retry_after) else MAX_RETRY_AFTER
+
+class RateLimited(AdmissionRejected):
+    """Raised when a single client exceeds its token-bucket rate."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("rate limit exceeded", retry_after)
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """Take one token. Returns 0.0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (1.0 - self.tokens) / self.rate
+
+class ClientRateLimiter:
+    """Token buckets keyed by client (connection or remote address)."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def new_bucket(self) -> TokenBucket:
+        return TokenBucket(self.rate, self.burst)
+
+    def check(self, client_key: str) -> None:
+        """Consume a token for client_key or raise AdmissionRejected."""
+        if self.rate <= 0:
+            return
+        bucket = self._buckets.get(client_key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_clients:
+                self._evict_idle()
+            bucket = self._buckets[client_key] = self.new_bucket()
+        wait = bucket.try_acquire()
+        if wait > 0:
+            raise RateLimited(wait)
+
+    def _evict_idle(self) -> None:
+        """Drop buckets that have refilled completely; they carry no state."""
+        now = time.monotonic()
+        refill = self.burst / self.rate
+        self._buckets = {k: b for k, b in self._buckets.items() if now - b.updated < refill}
+
+@dataclass
+class AdmissionTicket:
+    """Timing for one admitted request; queue wait is reported apart from execution."""
+    queue_wait: float
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def queue_wait_ms(self) -> float:
+        return self.queue_wait * 1000.0
+
+    @property
+    def exec_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000.0
+
+class AdmissionController:
+    """
+    Concurrency limits (global and per graph) with a bounded wait queue.
+    Requests that can't start immediately wait up to `queue_timeout` seconds;
+    if the queue is already full they are rejected at once.
+    """
+
+    def __init__(self, max_concurrent: int, max_per_graph: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_per_graph = max_per_graph
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self.waiting = 0
+        self.running_per_graph: Dict[str, int] = {}
+        # Moving average of execution time, used for Retry-After hints
+        self.avg_exec = 0.05
+        self._cond = asyncio.Condition()
+
+    def _has_capacity(self, graph_name: Optional[str]) -> bool:
+        if self.running >= self.max_concurrent:
+            return False
+        if graph_name is not None and self.running_per_graph.get(graph_name, 0) >= self.max_per_graph:
+            return False
+        return True
+
+    def retry_after(self) -> float:
+        """Rough time until the current backlog drains."""
+        return max(0.1, self.avg_exec * (self.waiting + 1) / max(1, self.max_concurrent))
+
+    @asynccontextmanager
+    async def admit(self, graph_name: Optional[str] = None):
+        """Wait for a slot and yield an AdmissionTicket, or raise AdmissionRejected."""
+        enqueued = time.monotonic()
+        async with self._cond:
+            if not self._has_capacity(graph_name):
+                if self.waiting >= self.max_queue:
+                    raise AdmissionRejected("server busy", self.retry_after())
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: self._has_capacity(graph_name)),
+                        timeout=self.queue_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    raise AdmissionRejected("timed out waiting in queue", self.retry_after())
+                finally:
+                    self.waiting -= 1
+            self.running += 1
+            if graph_name is not None:
+                self.running_per_graph[graph_name] = self.running_per_graph.get(graph_name, 0) + 1
+
+        ticket = AdmissionTicket(queue_wait=time.monotonic() - enqueued)
+        try:
+            yield ticket
+        finally:
+            elapsed = time.monotonic() - ticket.started
+            async with self._cond:
+                self.avg_exec = 0.9 * self.avg_exec + 0.1 * elapsed
+                self.running -= 1
+                if graph_name is not None:
+                    self.running_per_graph[graph_name] -= 1
+                    if not self.running_per_graph[graph_name]:
+                        del self.running_per_graph[graph_name]
+                self._cond.notify_all()
@@ -0,0 +1,12 @@
+import os
+import re
+
+import pytest
+
+QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_queries.txt")
+
+@pytest.fixture(scope="session")
+def queries():
+    """Numbered questions from test_queries.txt."""
+    with open(QUERIES_PATH, encoding="utf-8") as f:
+        return [m.group(1) for m in re.finditer(r"^\d+\.\s+(.+)$", f.read(), re.MULTILINE)]
@@ -0,0 +1,86 @@
+"""
+Worker processes for federated start-node selection.
+
+find_start_nodes is pure Python, so scoring many graphs on threads is
+serialized by the GIL. Each pool process instead keeps its own copy of every
+graph it has scored, rebuilt from the graph's source whenever the parent's
+version for it changes, and scores questions against that copy. A rebuild
+whose content doesn't match the parent's (the source changed on disk before
+the parent reloaded it) is refused rather than scored. Sharded graphs are
+scored by their shard workers instead, so pool processes drop their copies.
+"""
+import hashlib
+import multiprocessing
+import os
+import runpy
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Tuple
+
+import networkx as nx
+
+from graph_priors import attach_node_priors
+from scoring import find_start_nodes
+
+FEDERATED_PROCESSES = int(os.environ.get("RAGLM_FEDERATED_PROCESSES", str(os.cpu_count() or 1)))
+
+# Per worker process: graph name -> (version, graph)
+_worker_graphs: Dict[str, Tuple[int, nx.DiGraph]] = {}
+
+_pool = None
+
+class StaleGraphError(RuntimeError):
+    """The graph source no longer matches the version the parent is serving."""
+
+def graph_fingerprint(graph: nx.DiGraph) -> str:
+    """Hash of every node and edge with its attributes, cached per graph version."""
+    version = graph.graph.get("version", 0)
+    cached = graph.graph.get("fingerprint")
+    if cached is None or cached[0] != version:
+        digest = hashlib.sha1()
+        for node_id, data in graph.nodes(data=True):
+            digest.update(repr((node_id, sorted(data.items()))).encode("utf-8"))
+        for source, target, data in graph.edges(data=True):
+            digest.update(repr((source, target, sorted(data.items()))).encode("utf-8"))
+        cached = graph.graph["fingerprint"] = (version, digest.hexdigest())
+    return cached[1]
+
+def _start_nodes_in_worker(graph_name: str, version: int, fingerprint: str, source: str,
+                           cache_path: str, question: str, pooled_names: Tuple[str, ...]):
+    # Forget graphs that are no longer scored here, e.g. since they were sharded
+    for name in [name for name in _worker_graphs if name not in pooled_names]:
+        del _worker_graphs[name]
+    cached = _worker_graphs.get(graph_name)
+    if cached is None or cached[0] != version:
+        graph = runpy.run_path(source)["G"]
+        graph.graph["version"] = version
+        if graph_fingerprint(graph) != fingerprint:
+            raise StaleGraphError(f"{source} changed after version {version} was loaded")
+        # Persisted priors make this a file read rather than a recomputation
+        attach_node_priors(graph, cache_path)
+        cached = _worker_graphs[graph_name] = (version, graph)
+    return find_start_nodes(question, graph=cached[1])
+
+def submit_start_nodes(graph_name: str, graph: nx.DiGraph, source: str, cache_path: str, question: str,
+                       pooled_names: Tuple[str, ...] = None) -> Future:
+    """
+    Score question in a worker process against the same content as graph,
+    the parent's copy of graph_name. The future raises StaleGraphError if
+    the source on disk has moved on, or the source's own error if it fails
+    to load. pooled_names lists every graph still scored in the pool; the
+    worker drops its copies of any others.
+    """
+    if pooled_names is None:
+        pooled_names = (graph_name,)
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=FEDERATED_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool.submit(_start_nodes_in_worker, graph_name, graph.graph.get("version", 0),
+                        graph_fingerprint(graph), source, cache_path, question, tuple(pooled_names))
+
+def shutdown_federation_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
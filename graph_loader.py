@@ -3,21 +3,39 @@ Graph loader module to support multiple knowledge graphs.
 Can load from Python graph definitions or TTL files.
 """
 import networkx as nx
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 import os
+import runpy
+import threading
+import time
 
-# Import graph definitions
-from graph import G as eating_disorder_graph
-from sepsis_graph import G as sepsis_graph
+from graph_priors import attach_node_priors
 
-# Dictionary to store all available graphs
+# Python source defining each graph (module-level G), watched for hot reload
+GRAPH_SOURCES: Dict[str, str] = {
+    "eating_disorder": os.path.join(os.path.dirname(os.path.abspath(__file__)), "graph.py"),
+    "sepsis": os.path.join(os.path.dirname(os.path.abspath(__file__)), "sepsis_graph.py"),
+}
+
+# Dictionary to store all available graphs. Sources are run rather than
+# imported so no module keeps a graph alive after it is replaced.
 AVAILABLE_GRAPHS: Dict[str, nx.DiGraph] = {
-    "eating_disorder": eating_disorder_graph,
-    "sepsis": sepsis_graph,
+    name: runpy.run_path(source)["G"] for name, source in GRAPH_SOURCES.items()
 }
 
+def priors_path(graph_name: str) -> Optional[str]:
+    """File next to the graph's source where its node priors are persisted."""
+    source = GRAPH_SOURCES.get(graph_name)
+    if source is None:
+        return None
+    return os.path.splitext(source)[0] + ".priors.json"
+
+# Called as listener(graph_name, old_graph, new_graph) after a graph is swapped
+_reload_listeners: List[Callable[[str, nx.DiGraph, nx.DiGraph], None]] = []
+_reload_lock = threading.Lock()
+
 # Current active graph (default to eating disorder)
-_current_graph = eating_disorder_graph
+_current_graph = AVAILABLE_GRAPHS["eating_disorder"]
 _current_graph_name = "eating_disorder"
 
 def get_graph(graph_name: str = None) -> Optional[nx.DiGraph]:
@@ -49,9 +67,129 @@ def get_graph_info(graph_name: str = None) -> Dict:
     if graph is None:
         return {}
     
+    if graph.graph.get("sharded"):
+        # Stand-in for a graph held by shard workers; see mark_sharded
+        node_count, edge_count = graph.graph["node_count"], graph.graph["edge_count"]
+    else:
+        node_count, edge_count = graph.number_of_nodes(), graph.number_of_edges()
     return {
         "name": graph_name or _current_graph_name,
-        "node_count": graph.number_of_nodes(),
-        "edge_count": graph.number_of_edges(),
+        "node_count": node_count,
+        "edge_count": edge_count,
     }
 
+
+def compute_priors_in_background() -> threading.Thread:
+    """Compute static node priors for every graph on a daemon thread."""
+    def _run():
+        for name, graph in list(AVAILABLE_GRAPHS.items()):
+            attach_node_priors(graph, priors_path(name))
+
+    thread = threading.Thread(target=_run, name="graph-priors", daemon=True)
+    thread.start()
+    return thread
+
+def mark_sharded(graph_name: str, graph: nx.DiGraph) -> bool:
+    """
+    Replace graph with an empty stand-in once shard workers serve it, so this
+    process stops holding its nodes and edges. The stand-in keeps the version
+    and counts. Returns False if graph is no longer the registered version.
+    """
+    global _current_graph
+    with _reload_lock:
+        if AVAILABLE_GRAPHS.get(graph_name) is not graph:
+            return False
+        stand_in = nx.DiGraph(
+            version=graph.graph.get("version", 0),
+            sharded=True,
+            node_count=graph.number_of_nodes(),
+            edge_count=graph.number_of_edges(),
+        )
+        AVAILABLE_GRAPHS[graph_name] = stand_in
+        if _current_graph is graph:
+            _current_graph = stand_in
+    return True
+
+def add_reload_listener(listener: Callable[[str, nx.DiGraph, nx.DiGraph], None]) -> None:
+    """Register a callback to drop per-graph caches when a graph is reloaded."""
+    _reload_listeners.append(listener)
+
+def diff_graphs(old: nx.DiGraph, new: nx.DiGraph) -> Dict:
+    """Summarize node/edge differences between two versions of a graph."""
+    old_edges = {(u, v): d for u, v, d in old.edges(data=True)}
+    new_edges = {(u, v): d for u, v, d in new.edges(data=True)}
+    return {
+        "added_nodes": [n for n in new.nodes if n not in old.nodes],
+        "removed_nodes": [n for n in old.nodes if n not in new.nodes],
+        "changed_nodes": [n for n in new.nodes if n in old.nodes and old.nodes[n] != new.nodes[n]],
+        "added_edges": [e for e in new_edges if e not in old_edges],
+        "removed_edges": [e for e in old_edges if e not in new_edges],
+        "changed_edges": [e for e in new_edges if e in old_edges and old_edges[e] != new_edges[e]],
+    }
+
+def reload_graph(graph_name: str) -> Optional[Dict]:
+    """
+    Rebuild one graph from its source and atomically swap it in.
+    Traces already holding the old graph object finish on the old version.
+    Returns the diff, or None if the source failed to load or nothing changed.
+    """
+    global _current_graph
+    source = GRAPH_SOURCES.get(graph_name)
+    if source is None:
+        return None
+    try:
+        new_graph = runpy.run_path(source)["G"]
+    except Exception as exc:
+        print(f"Failed to reload graph '{graph_name}' from {source}: {exc}")
+        return None
+
+    with _reload_lock:
+        old_graph = AVAILABLE_GRAPHS[graph_name]
+        if old_graph.graph.get("sharded"):
+            # Contents live in shard workers, so treat everything as new
+            diff = diff_graphs(nx.DiGraph(), new_graph)
+        else:
+            diff = diff_graphs(old_graph, new_graph)
+            if not any(diff.values()):
+                return None
+        new_graph.graph["version"] = old_graph.graph.get("version", 0) + 1
+
+        # Priors only depend on structure, so label/description edits keep them
+        structural = diff["added_nodes"] or diff["removed_nodes"] or diff["added_edges"] or diff["removed_edges"]
+        if not structural and "node_priors" in old_graph.graph:
+            new_graph.graph["node_priors"] = old_graph.graph["node_priors"]
+            new_graph.graph["priors_version"] = new_graph.graph["version"]
+        else:
+            attach_node_priors(new_graph, priors_path(graph_name))
+
+        AVAILABLE_GRAPHS[graph_name] = new_graph
+        if _current_graph is old_graph:
+            _current_graph = new_graph
+
+    for listener in list(_reload_listeners):
+        listener(graph_name, old_graph, new_graph)
+    print(f"Reloaded graph '{graph_name}' (version {new_graph.graph['version']}): "
+          + ", ".join(f"{len(v)} {k.replace('_', ' ')}" for k, v in diff.items() if v))
+    return diff
+
+def start_graph_watcher(interval: float = 1.0) -> threading.Thread:
+    """Poll graph sources on a daemon thread and reload any that change."""
+    def _mtime(path: str) -> float:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return 0.0
+
+    def _run():
+        mtimes = {name: _mtime(path) for name, path in GRAPH_SOURCES.items()}
+        while True:
+            time.sleep(interval)
+            for name, path in GRAPH_SOURCES.items():
+                mtime = _mtime(path)
+                if mtime != mtimes[name]:
+                    mtimes[name] = mtime
+                    reload_graph(name)
+
+    thread = threading.Thread(target=_run, name="graph-watcher", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,88 @@
+"""
+Incremental re-tracing for as-you-type questions.
+
+An IncrementalSession lives on one WebSocket connection. It remembers the
+previous question's keywords, per-node keyword scores and trace, so when a
+few tokens change only those tokens' contributions are added or removed and
+only the trace steps that differ need to be sent.
+"""
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import networkx as nx
+
+from graph_priors import get_node_prior
+from scoring import PRIOR_WEIGHT, get_node_texts, keyword_points, question_keywords
+
+class IncrementalSession:
+    """Per-connection state for incremental traces."""
+
+    def __init__(self, max_cached_tokens: int = 256):
+        self.max_cached_tokens = max_cached_tokens
+        self.graph = None
+        self.reset()
+
+    def reset(self, graph: nx.DiGraph = None) -> None:
+        self.graph = graph
+        self.tokens: Counter = Counter()
+        # Sum of keyword points per node, nonzero entries only
+        self.keyword_scores: Dict[str, float] = {}
+        # Points each token earns per node, reused when a token comes back
+        self.token_points: Dict[str, Dict[str, float]] = {}
+        # Trace as last sent to the client
+        self.events: list = []
+        self._order = {node_id: i for i, node_id in enumerate(graph)} if graph is not None else {}
+
+    def _points(self, token: str) -> Dict[str, float]:
+        points = self.token_points.get(token)
+        if points is None:
+            points = {}
+            for node_id, text in get_node_texts(self.graph).items():
+                value = keyword_points(token, text)
+                if value:
+                    points[node_id] = value
+            if len(self.token_points) >= self.max_cached_tokens:
+                # Forget tokens that aren't in the current question
+                for stale in [t for t in self.token_points if t not in self.tokens]:
+                    del self.token_points[stale]
+            self.token_points[token] = points
+        return points
+
+    def update(self, question: str, graph: nx.DiGraph) -> Dict[str, float]:
+        """
+        Apply the token delta from the previous question and return relevance
+        (keyword points plus prior, as score_node_relevance computes it) for
+        every matching node, in graph order.
+        """
+        if graph is not self.graph:
+            # New graph or a hot-reloaded version: nothing carries over
+            self.reset(graph)
+        tokens = Counter(question_keywords(question))
+        added = tokens - self.tokens
+        removed = self.tokens - tokens
+        self.tokens = tokens
+
+        for delta, sign in ((added, 1.0), (removed, -1.0)):
+            for token, count in delta.items():
+                for node_id, value in self._points(token).items():
+                    total = self.keyword_scores.get(node_id, 0.0) + sign * count * value
+                    if total > 0:
+                        self.keyword_scores[node_id] = total
+                    else:
+                        self.keyword_scores.pop(node_id, None)
+
+        scores = {
+            node_id: score + PRIOR_WEIGHT * get_node_prior(node_id, graph) if PRIOR_WEIGHT else score
+            for node_id, score in self.keyword_scores.items()
+        }
+        return dict(sorted(scores.items(), key=lambda item: self._order[item[0]]))
+
+    def clear_trace(self) -> None:
+        """Forget the sent trace, e.g. after the client was sent a full one."""
+        self.events = []
+
+    def patch(self, events: list) -> List[int]:
+        """Record the new trace and return the step indexes that changed."""
+        changed = [i for i, event in enumerate(events) if i >= len(self.events) or self.events[i] != event]
+        self.events = list(events)
+        return changed
@@ -1,18 +1,87 @@
 # backend/main.py
+import asyncio
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager, suppress
 from dataclasses import asdict
-from typing import List, Optional, Tuple
-import re
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import heapq
+import math
+import os
+import threading
+import uuid
 
 import networkx as nx
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import uvicorn
 
 # Import graph loader
-from graph_loader import get_graph, set_active_graph, get_active_graph_name, list_available_graphs, get_graph_info
+from graph_loader import get_graph, set_active_graph, get_active_graph_name, list_available_graphs, get_graph_info, compute_priors_in_background, start_graph_watcher, add_reload_listener, mark_sharded, priors_path, reload_graph, GRAPH_SOURCES
+from scoring import score_node_relevance, find_start_nodes
+from sharding import ShardCoordinator, ShardError, add_failure_listener, get_coordinator, start_sharding, stop_sharding, use_coordinator
+from trace_log import TraceLogSink
+from federation import shutdown_federation_pool, submit_start_nodes
+from admission import AdmissionController, AdmissionRejected, AdmissionTicket, ClientRateLimiter, RateLimited, TokenBucket
+from incremental import IncrementalSession
 
-app = FastAPI()
+# Worker processes per graph for partitioned serving; 0 keeps graphs in-process
+SHARD_COUNT = int(os.environ.get("RAGLM_SHARDS", "0"))
+SHARD_STRATEGY = os.environ.get("RAGLM_SHARD_STRATEGY", "hash")
+
+# Seconds an incremental (as-you-type) trace waits for further keystrokes
+INCREMENTAL_DEBOUNCE = float(os.environ.get("RAGLM_INCREMENTAL_DEBOUNCE", "0.15"))
+
+# Seconds between graph source checks; 0 disables hot reload
+GRAPH_WATCH_INTERVAL = float(os.environ.get("RAGLM_GRAPH_WATCH_INTERVAL", "1.0"))
+
+# Directory for the compressed trace log; unset disables trace logging
+TRACE_LOG_DIR = os.environ.get("RAGLM_TRACE_LOG_DIR")
+trace_sink = TraceLogSink(TRACE_LOG_DIR) if TRACE_LOG_DIR else None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_background_jobs()
+    yield
+    stop_background_jobs()
+
+app = FastAPI(lifespan=lifespan)
+
+# --------- Admission control ---------
+admission = AdmissionController(
+    max_concurrent=int(os.environ.get("RAGLM_MAX_CONCURRENT", "32")),
+    max_per_graph=int(os.environ.get("RAGLM_MAX_PER_GRAPH", "16")),
+    max_queue=int(os.environ.get("RAGLM_MAX_QUEUE", "64")),
+    queue_timeout=float(os.environ.get("RAGLM_QUEUE_TIMEOUT", "2.0")),
+)
+# Per-client token buckets; a rate of 0 disables client limits
+client_limiter = ClientRateLimiter(
+    rate=float(os.environ.get("RAGLM_CLIENT_RATE", "10")),
+    burst=float(os.environ.get("RAGLM_CLIENT_BURST", "20")),
+)
+
+@app.middleware("http")
+async def admission_middleware(request: Request, call_next):
+    """Apply client rate limits and concurrency limits to every REST call."""
+    client_key = request.client.host if request.client else "unknown"
+    try:
+        client_limiter.check(client_key)
+        # Routing hasn't run yet, so REST calls only count against the global limit
+        async with admission.admit() as ticket:
+            response = await call_next(request)
+            response.headers["Server-Timing"] = (
+                f"queue;dur={ticket.queue_wait_ms:.3f}, exec;dur={ticket.exec_ms:.3f}"
+            )
+            return response
+    except AdmissionRejected as exc:
+        status_code = 429 if isinstance(exc, RateLimited) else 503
+        return JSONResponse(
+            status_code=status_code,
+            content={"detail": f"Request rejected: {exc.reason}"},
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+        )
 
 # Allow local frontend
 app.add_middleware(
@@ -36,89 +105,6 @@ class TraceEvent:
     direction: Optional[str]
 
 # --------- Improved traversal ---------
-def score_node_relevance(node_id: str, question: str, graph: nx.DiGraph = None) -> float:
-    """Score how relevant a node is to the question."""
-    if graph is None:
-        graph = get_graph()
-    
-    if node_id not in graph.nodes:
-        return 0.0
-    
-    node_data = graph.nodes[node_id]
-    q_lower = question.lower()
-    
-    # Extract text from node
-    label = node_data.get("label", "").lower()
-    description = node_data.get("description", "").lower()
-    node_id_lower = node_id.lower().replace("_", " ")
-    
-    # Count keyword matches
-    score = 0.0
-    keywords = re.findall(r'\b\w+\b', q_lower)
-    
-    for keyword in keywords:
-        if len(keyword) < 3:  # Skip very short words
-            continue
-        if keyword in label:
-            score += 2.0
-        if keyword in description:
-            score += 1.0
-        if keyword in node_id_lower:
-            score += 1.5
-    
-    return score
-
-def find_start_nodes(question: str, max_candidates: int = 5, graph: nx.DiGraph = None) -> List[Tuple[str, float]]:
-    """Find the most relevant starting nodes based on keyword matching."""
-    if graph is None:
-        graph = get_graph()
-    
-    q_lower = question.lower()
-    candidates = []
-    
-    # Score all nodes
-    for node_id in graph.nodes():
-        score = score_node_relevance(node_id, question, graph)
-        if score > 0:
-            candidates.append((node_id, score))
-    
-    # Sort by score and return top candidates
-    candidates.sort(key=lambda x: x[1], reverse=True)
-    
-    # If no good matches, try some fallback patterns
-    if not candidates or candidates[0][1] < 0.5:
-        fallbacks = []
-        # Eating disorder patterns
-        if "anorexia" in q_lower or "restrict" in q_lower:
-            fallbacks.append(("anorexia_nervosa", 1.0))
-        if "bulimia" in q_lower or ("binge" in q_lower and "purge" in q_lower):
-            fallbacks.append(("bulimia_nervosa", 1.0))
-        if "treatment" in q_lower or "therapy" in q_lower or "cbt" in q_lower:
-            if "sepsis" not in q_lower:
-                fallbacks.append(("cbt_ed", 1.0))
-        if ("symptom" in q_lower or "sign" in q_lower) and "sepsis" not in q_lower:
-            fallbacks.append(("body_image_distortion", 0.8))
-        if "risk" in q_lower or "cause" in q_lower or "factor" in q_lower:
-            if "sepsis" not in q_lower:
-                fallbacks.append(("genetic_predisposition", 0.8))
-        # Sepsis patterns
-        if "sepsis" in q_lower or "septic" in q_lower:
-            fallbacks.append(("sepsis", 1.0))
-        if "sofa" in q_lower:
-            fallbacks.append(("sofa_score", 1.0))
-        if "qsofa" in q_lower or "quick sofa" in q_lower:
-            fallbacks.append(("qsofa_score", 1.0))
-        if "sirs" in q_lower:
-            fallbacks.append(("sirs_criteria", 1.0))
-        if "infection" in q_lower and "sepsis" in q_lower:
-            fallbacks.append(("infection", 0.9))
-        if "organ" in q_lower and "dysfunction" in q_lower:
-            fallbacks.append(("organ_dysfunction", 0.9))
-        if fallbacks:
-            candidates = fallbacks + candidates
-    
-    return candidates[:max_candidates]
-
 def get_neighbors_bidirectional(node_id: str, graph: nx.DiGraph = None) -> List[Tuple[str, str, Optional[str]]]:
     """Get both incoming and outgoing neighbors with their relations."""
     if graph is None:
@@ -136,17 +122,57 @@ def get_neighbors_bidirectional(node_id: str, graph: nx.DiGraph = None) -> List[
     
     return neighbors
 
-def traverse_graph(question: str, max_steps: int = 30, graph: nx.DiGraph = None):
+def _describe_step(label_of: Callable[[str], str], node_id: str, from_id: Optional[str],
+                   direction: Optional[str], rel: Optional[str], relevance: float) -> str:
+    node_label = label_of(node_id)
+    if from_id is None:
+        return f"Starting at '{node_label}' (relevance score: {relevance:.2f}) based on keyword matching."
+    from_label = label_of(from_id)
+    direction_str = "following" if direction == "out" else "tracing back"
+    return f"{direction_str.capitalize()} from '{from_label}' to '{node_label}' via '{rel}' relation."
+
+def traverse_graph(question: str, max_steps: int = 30, graph: nx.DiGraph = None,
+                   start_candidates: List[Tuple[str, float]] = None,
+                   shards: ShardCoordinator = None, node_scores: Dict[str, float] = None):
     """
     Improved traversal that:
     - Finds relevant start nodes via keyword matching
     - Traverses bidirectionally (both in and out edges)
     - Prioritizes relevant paths
+    
+    Pass start_candidates to reuse an earlier find_start_nodes result. With
+    shards, the graph is served by worker processes: each step sends one
+    expansion request and one batched scoring request per shard, and the
+    resulting trace is identical to the in-process one.
+    
+    node_scores may hold precomputed relevance for every nonzero node in graph
+    order (e.g. from an IncrementalSession); nodes are then looked up instead
+    of rescored.
     """
     if graph is None:
         graph = get_graph()
     
-    start_candidates = find_start_nodes(question, graph=graph)
+    if shards is not None:
+        label_of = shards.label
+        expand = lambda node_id: shards.neighbors([node_id])[node_id]
+        score_many = lambda node_ids: shards.score_nodes(question, node_ids)
+    else:
+        label_of = lambda node_id: graph.nodes[node_id].get("label", node_id)
+        expand = lambda node_id: get_neighbors_bidirectional(node_id, graph)
+        if node_scores is not None:
+            score_many = lambda node_ids: {n: node_scores.get(n, 0.0) for n in node_ids}
+        else:
+            score_many = lambda node_ids: {n: score_node_relevance(n, question, graph) for n in node_ids}
+    
+    if start_candidates is None:
+        if node_scores is not None:
+            start_candidates = find_start_nodes(question, graph=graph, node_scores=node_scores)
+        elif shards is not None:
+            # Workers blend fuzzy matches from their own trigram indexes
+            start_candidates = find_start_nodes(question, graph=shards, node_scores=shards.score_nodes(question),
+                                                fuzzy_weight=0)
+        else:
+            start_candidates = find_start_nodes(question, graph=graph)
     
     if not start_candidates:
         return
@@ -178,34 +204,25 @@ def traverse_graph(question: str, max_steps: int = 30, graph: nx.DiGraph = None)
             
         visited.add(node_id)
         
-        node_data = graph.nodes[node_id]
-        node_label = node_data.get("label", node_id)
-        
-        if from_id is None:
-            rationale = f"Starting at '{node_label}' (relevance score: {relevance:.2f}) based on keyword matching."
-        else:
-            from_label = graph.nodes[from_id].get("label", from_id)
-            direction_str = "following" if direction == "out" else "tracing back"
-            rationale = f"{direction_str.capitalize()} from '{from_label}' to '{node_label}' via '{rel}' relation."
-        
         event = TraceEvent(
             step=step,
             node_id=node_id,
             from_node_id=from_id,
             edge_relation=rel,
             score=relevance,
-            rationale=rationale,
+            rationale=_describe_step(label_of, node_id, from_id, direction, rel, relevance),
             direction=direction,
         )
         yield event
         step += 1
         
         # Add neighbors to queue with decreasing relevance
-        neighbors = get_neighbors_bidirectional(node_id, graph)
+        neighbors = expand(node_id)
+        # Calculate relevance for all unvisited neighbors in one batch
+        neighbor_scores = score_many([n for n, _, _ in neighbors if n not in visited])
         for neighbor_id, neighbor_dir, neighbor_rel in neighbors:
             if neighbor_id not in visited:
-                # Calculate relevance for neighbor
-                neighbor_score = score_node_relevance(neighbor_id, question, graph)
+                neighbor_score = neighbor_scores[neighbor_id]
                 # Decay relevance with depth
                 neighbor_score *= (0.7 ** (depth + 1))
                 queue.append((neighbor_id, node_id, neighbor_dir, neighbor_rel, neighbor_score, depth + 1))
@@ -213,7 +230,192 @@ def traverse_graph(question: str, max_steps: int = 30, graph: nx.DiGraph = None)
         # Re-sort queue to maintain priority
         queue.sort(key=lambda x: x[4], reverse=True)
 
+def traverse_graph_beam(question: str, max_steps: int = 30, graph: nx.DiGraph = None,
+                        start_candidates: List[Tuple[str, float]] = None,
+                        beam_width: Union[int, List[int]] = 5, max_frontier: int = 64,
+                        max_depth: int = 3):
+    """
+    Beam-search traversal with bounded frontier memory.
+    
+    Expands the graph one depth level at a time, keeping only the best
+    beam_width nodes per level (a list gives a width per depth, the last entry
+    repeating). Candidates for the next level live in a min-heap capped at
+    max_frontier entries, so memory and per-step cost don't grow with the
+    number of edges touched. Emits the same TraceEvent stream as traverse_graph.
+    """
+    if graph is None:
+        graph = get_graph()
+    
+    if start_candidates is None:
+        start_candidates = find_start_nodes(question, graph=graph)
+    
+    if not start_candidates:
+        return
+    
+    label_of = lambda node_id: graph.nodes[node_id].get("label", node_id)
+    
+    def width_at(depth: int) -> int:
+        if isinstance(beam_width, int):
+            return beam_width
+        return beam_width[min(depth, len(beam_width) - 1)]
+    
+    visited = set()
+    step = 0
+    seq = 0
+    # Beam entries: (node_id, from_node_id, direction, relation, relevance_score, depth)
+    beam = [(node_id, None, None, None, score, 0) for node_id, score in start_candidates]
+    beam.sort(key=lambda x: x[4], reverse=True)
+    beam = beam[:width_at(0)]
+    
+    while beam and step < max_steps:
+        depth = beam[0][5]
+        expanded = []
+        for node_id, from_id, direction, rel, relevance, _ in beam:
+            if node_id in visited or step >= max_steps:
+                continue
+            visited.add(node_id)
+            yield TraceEvent(
+                step=step,
+                node_id=node_id,
+                from_node_id=from_id,
+                edge_relation=rel,
+                score=relevance,
+                rationale=_describe_step(label_of, node_id, from_id, direction, rel, relevance),
+                direction=direction,
+            )
+            step += 1
+            expanded.append(node_id)
+        
+        if depth >= max_depth:
+            break
+        
+        # Bounded min-heap of (score, -seq, entry): the weakest candidate is evicted
+        # first, and earlier discoveries win ties like the stable sort in traverse_graph
+        frontier = []
+        for node_id in expanded:
+            for neighbor_id, neighbor_dir, neighbor_rel in get_neighbors_bidirectional(node_id, graph):
+                if neighbor_id in visited:
+                    continue
+                neighbor_score = score_node_relevance(neighbor_id, question, graph) * (0.7 ** (depth + 1))
+                item = (neighbor_score, -seq, (neighbor_id, node_id, neighbor_dir, neighbor_rel, neighbor_score, depth + 1))
+                seq += 1
+                if len(frontier) < max_frontier:
+                    heapq.heappush(frontier, item)
+                elif item > frontier[0]:
+                    heapq.heapreplace(frontier, item)
+        
+        # Best entry per node, highest score first
+        beam = []
+        seen = set()
+        for _, _, entry in sorted(frontier, reverse=True):
+            if entry[0] not in seen:
+                seen.add(entry[0])
+                beam.append(entry)
+                if len(beam) >= width_at(depth + 1):
+                    break
+
+# --------- Federated trace ---------
+# Graphs whose best start-node score is below this are pruned before tracing
+FEDERATED_MIN_SCORE = float(os.environ.get("RAGLM_FEDERATED_MIN_SCORE", "1.0"))
+# Graphs scoring below this fraction of the best graph's score are pruned too
+FEDERATED_RELATIVE_SCORE = float(os.environ.get("RAGLM_FEDERATED_RELATIVE_SCORE", "0.5"))
+FEDERATED_MAX_GRAPHS = int(os.environ.get("RAGLM_FEDERATED_MAX_GRAPHS", "2"))
+
+# Sharded graphs are scored by their shard workers; these threads only wait on pipes
+_shard_scoring_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="federated-shards")
+
+def _sharded_start_nodes(graph_name: str, graph: nx.DiGraph, question: str) -> List[Tuple[str, float]]:
+    with use_coordinator(graph_name, graph) as shards:
+        if shards is None:
+            raise ShardError(f"Graph '{graph_name}' is being resharded")
+        # Workers blend fuzzy matches from their own trigram indexes
+        return find_start_nodes(question, graph=shards, node_scores=shards.score_nodes(question), fuzzy_weight=0)
+
+def select_federated_graphs(question: str, min_score: float = None,
+                            max_graphs: int = None) -> List[Tuple[str, nx.DiGraph, List[Tuple[str, float]]]]:
+    """
+    Score start nodes on every registered graph concurrently and return the
+    winners as (graph_name, graph, start_candidates), best graph first.
+    
+    Graphs are scored in federation worker processes, so scoring runs in
+    parallel across CPUs instead of contending for the GIL; sharded graphs
+    are scored by their own shard workers. A graph whose workers fail, e.g.
+    on a source edited but not yet reloaded, is skipped.
+    """
+    if min_score is None:
+        min_score = FEDERATED_MIN_SCORE
+    if max_graphs is None:
+        max_graphs = FEDERATED_MAX_GRAPHS
+    
+    # Snapshot the registry so every worker sees a consistent set of graphs
+    graphs = {name: get_graph(name) for name in list_available_graphs()}
+    pooled = tuple(name for name, graph in graphs.items() if not graph.graph.get("sharded"))
+    futures = {}
+    for name, graph in graphs.items():
+        if graph.graph.get("sharded"):
+            future = _shard_scoring_pool.submit(_sharded_start_nodes, name, graph, question)
+        else:
+            future = submit_start_nodes(name, graph, GRAPH_SOURCES[name], priors_path(name), question, pooled)
+        futures[future] = name
+    
+    scored = []
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            candidates = future.result()
+        except Exception as exc:
+            print(f"Skipping graph '{name}' in federated trace: {exc!r}")
+            continue
+        if not graphs[name].graph.get("sharded"):
+            # Start nodes must exist in the version this process traverses
+            candidates = [(node_id, score) for node_id, score in candidates if node_id in graphs[name]]
+        if candidates and candidates[0][1] >= min_score:
+            scored.append((name, graphs[name], candidates))
+    
+    if not scored:
+        return []
+    # Deterministic order: best score first, then registry order
+    order = {name: i for i, name in enumerate(graphs)}
+    scored.sort(key=lambda x: (-x[2][0][1], order[x[0]]))
+    best = scored[0][2][0][1]
+    return [entry for entry in scored if entry[2][0][1] >= best * FEDERATED_RELATIVE_SCORE][:max_graphs]
+
 # --------- REST endpoints ---------
+def _shard_graph(graph_name: str, graph: nx.DiGraph) -> None:
+    """Move graph into shard workers and drop this process's copy of it."""
+    try:
+        start_sharding(graph_name, graph, SHARD_COUNT, SHARD_STRATEGY)
+    except ShardError as exc:
+        print(f"Serving graph '{graph_name}' in-process: {exc}")
+        return
+    mark_sharded(graph_name, graph)
+
+def start_background_jobs():
+    """Kick off per-graph precomputation without delaying startup."""
+    priors_thread = compute_priors_in_background()
+    if SHARD_COUNT > 0:
+        # Shard files carry each node's prior, so wait for those first
+        def _start_shards():
+            priors_thread.join()
+            for name in list_available_graphs():
+                _shard_graph(name, get_graph(name))
+        threading.Thread(target=_start_shards, name="graph-shards", daemon=True).start()
+        add_reload_listener(lambda name, old, new: _shard_graph(name, new))
+        # Workers that can't be restarted: load the graph in-process again, which
+        # serves it right away and reshards it through the reload listener
+        add_failure_listener(lambda name: threading.Thread(
+            target=reload_graph, args=(name,), name="graph-restore", daemon=True
+        ).start())
+    if GRAPH_WATCH_INTERVAL > 0:
+        start_graph_watcher(GRAPH_WATCH_INTERVAL)
+
+def stop_background_jobs():
+    """Flush the trace log and stop shard and federation workers."""
+    if trace_sink is not None:
+        trace_sink.close()
+    stop_sharding()
+    shutdown_federation_pool()
+
 @app.get("/graphs")
 async def list_graphs():
     """List all available graphs."""
@@ -237,11 +439,24 @@ async def activate_graph(graph_name: str):
     else:
         raise HTTPException(status_code=404, detail=f"Graph '{graph_name}' not found")
 
-@app.get("/graphs/current")
-async def get_current_graph():
-    """Get information about the current graph."""
-    name = get_active_graph_name()
-    graph = get_graph()
+def _graph_payload(name: str, graph: nx.DiGraph) -> dict:
+    with use_coordinator(name, graph) as shards:
+        if shards is not None:
+            # Node and edge data only exist in the shard workers
+            try:
+                nodes, edges = shards.dump()
+            except ShardError as exc:
+                raise HTTPException(status_code=503, detail=str(exc))
+            return {
+                "name": name,
+                "node_count": shards.node_count,
+                "edge_count": shards.edge_count,
+                "nodes": [{"id": node_id, "label": label, "type": kind} for node_id, label, kind in nodes],
+                "edges": [
+                    {"from": source, "to": target, "relation": rel if rel is not None else "related_to"}
+                    for source, target, rel in edges
+                ],
+            }
     return {
         "name": name,
         "node_count": graph.number_of_nodes(),
@@ -256,49 +471,261 @@ async def get_current_graph():
         ]
     }
 
+# Plain def: sharded graphs are read over worker pipes, so these run in the threadpool
+@app.get("/graphs/current")
+def get_current_graph():
+    """Get information about the current graph."""
+    return _graph_payload(get_active_graph_name(), get_graph())
+
+@app.get("/graphs/{graph_name}")
+def get_named_graph(graph_name: str):
+    """Get a graph's nodes and edges without making it the active graph."""
+    if graph_name not in list_available_graphs():
+        raise HTTPException(status_code=404, detail=f"Graph '{graph_name}' not found")
+    return _graph_payload(graph_name, get_graph(graph_name))
+
 # --------- WebSocket endpoint ---------
+def _timing(ticket: AdmissionTicket) -> dict:
+    return {"queue_wait_ms": round(ticket.queue_wait_ms, 3), "exec_ms": round(ticket.exec_ms, 3)}
+
+def _traversal_for(payload: dict):
+    """
+    Pick the traversal from the /trace payload: {"mode": "beam", "beam_width": 5
+    or [8, 4, 2], "max_frontier": 64}. Defaults to best-first traverse_graph.
+    Raises ValueError for a bad mode or beam setting.
+    """
+    mode = payload.get("mode", "best_first")
+    if mode == "best_first":
+        return traverse_graph
+    if mode != "beam":
+        raise ValueError(f"Unknown traversal mode '{mode}'")
+    beam_width = payload.get("beam_width", 5)
+    max_frontier = payload.get("max_frontier", 64)
+    widths = beam_width if isinstance(beam_width, list) else [beam_width]
+    # bool is an int subclass, so JSON true/false would otherwise pass as 1/0
+    positive = lambda v: isinstance(v, int) and not isinstance(v, bool) and v >= 1
+    if not widths or not all(positive(w) for w in widths) or not positive(max_frontier):
+        raise ValueError("beam_width and max_frontier must be positive integers")
+    return partial(traverse_graph_beam, beam_width=beam_width, max_frontier=max_frontier)
+
+async def _send_rejection(ws: WebSocket, exc: AdmissionRejected):
+    await ws.send_text(json.dumps({
+        "type": "error",
+        "message": f"Request rejected: {exc.reason}",
+        "retry_after": round(exc.retry_after, 3),
+    }))
+
+async def _incremental_trace(ws: WebSocket, session: IncrementalSession, question: str,
+                             graph: nx.DiGraph, graph_name: str, rate_bucket: Optional[TokenBucket]):
+    """
+    Debounced incremental trace. Cancelled if a newer message arrives first;
+    otherwise sends a trace_patch with only the steps that changed.
+    """
+    await asyncio.sleep(INCREMENTAL_DEBOUNCE)
+    # Only debounced work counts against the client's rate, not every keystroke
+    wait = rate_bucket.try_acquire() if rate_bucket is not None else 0.0
+    if wait > 0:
+        await _send_rejection(ws, RateLimited(wait))
+        return
+    try:
+        async with admission.admit(graph_name) as ticket:
+            node_scores = session.update(question, graph)
+            events = list(traverse_graph(question, graph=graph, node_scores=node_scores))
+            if trace_sink is not None:
+                # Every debounced trace is logged in full, like a fresh one
+                trace_id = uuid.uuid4().hex
+                for event in events:
+                    trace_sink.record(trace_id, graph_name, event)
+            changed = session.patch(events)
+            # Session state is already updated, so finish the send even if cancelled now
+            await asyncio.shield(ws.send_text(json.dumps({
+                "type": "trace_patch",
+                "length": len(events),
+                "steps": [asdict(events[i]) for i in changed],
+                **_timing(ticket),
+            })))
+    except AdmissionRejected as exc:
+        await _send_rejection(ws, exc)
+
+def _serving_traversal(graph_name: str, graph: nx.DiGraph, shards: Optional[ShardCoordinator], traverse):
+    """
+    Route best-first traces through the graph's shards when it has them.
+    Raises ShardError if the graph only exists in shard workers that are
+    being replaced, and ValueError for beam traces on such a graph.
+    """
+    if shards is not None and traverse is traverse_graph:
+        return partial(traverse_graph, shards=shards)
+    if graph.graph.get("sharded"):
+        if shards is None:
+            raise ShardError(f"Graph '{graph_name}' is being resharded, try again")
+        raise ValueError(f"Beam traversal is not available for sharded graph '{graph_name}'")
+    return traverse
+
+async def _steps(events, off_loop: bool):
+    """Iterate trace events; with off_loop each step runs in the default executor."""
+    if not off_loop:
+        for event in events:
+            yield event
+        return
+    # Sharded steps block on worker pipes, which must not stall the event loop
+    loop = asyncio.get_running_loop()
+    while True:
+        event = await loop.run_in_executor(None, next, events, None)
+        if event is None:
+            return
+        yield event
+
+async def _cancel(task: Optional[asyncio.Task]):
+    if task is None:
+        return
+    task.cancel()
+    with suppress(asyncio.CancelledError, WebSocketDisconnect):
+        await task
+
 @app.websocket("/trace")
 async def trace_endpoint(ws: WebSocket):
     await ws.accept()
+    # Rate limit per connection rather than per address; a rate of 0 disables it
+    rate_bucket = client_limiter.new_bucket() if client_limiter.rate > 0 else None
+    session = IncrementalSession()
+    # Debounced incremental trace waiting to run, if any
+    pending = None
     try:
         while True:
-            # Expect JSON: {"question": "...", "graph_name": "..." (optional)}
+            # Expect JSON: {"question": "...", "graph_name": "..." (optional),
+            #               "federated": bool, "mode": "best_first" | "beam" (optional),
+            #               "incremental": bool (optional)}
             data = await ws.receive_text()
             payload = json.loads(data)
             question = payload.get("question", "")
             graph_name = payload.get("graph_name", None)
+            incremental = bool(payload.get("incremental"))
+            
+            # Any newer message makes earlier incremental work stale
+            await _cancel(pending)
+            pending = None
             
-            # Switch graph if requested
-            if graph_name:
-                if set_active_graph(graph_name):
-                    await ws.send_text(json.dumps({
-                        "type": "graph_switched",
-                        "graph_name": graph_name
-                    }))
-                else:
-                    await ws.send_text(json.dumps({
-                        "type": "error",
-                        "message": f"Graph '{graph_name}' not found"
-                    }))
+            try:
+                traverse = _traversal_for(payload)
+                if incremental and (payload.get("federated") or traverse is not traverse_graph):
+                    raise ValueError("Incremental traces support best-first traversal of a single graph")
+            except (TypeError, ValueError) as exc:
+                await ws.send_text(json.dumps({"type": "error", "message": str(exc)}))
+                continue
+            
+            if not incremental:
+                wait = rate_bucket.try_acquire() if rate_bucket is not None else 0.0
+                if wait > 0:
+                    await _send_rejection(ws, RateLimited(wait))
                     continue
-
-            # Get current graph
-            graph = get_graph()
+                # The client is about to be sent a full trace
+                session.clear_trace()
             
-            # You might send an event to clear the previous trace
-            await ws.send_text(json.dumps({"type": "reset"}))
-
-            # Stream trace events as we traverse
-            for event in traverse_graph(question, graph=graph):
-                await ws.send_text(json.dumps({
-                    "type": "trace_step",
-                    **asdict(event),
-                }))
-            # Once done, you can send a "done" message
-            await ws.send_text(json.dumps({"type": "done"}))
+            try:
+                if payload.get("federated"):
+                    if traverse is not traverse_graph and any(
+                        get_graph(name).graph.get("sharded") for name in list_available_graphs()
+                    ):
+                        await ws.send_text(json.dumps({
+                            "type": "error",
+                            "message": "Beam traversal is not available for federated traces over sharded graphs",
+                        }))
+                        continue
+                    # Federated traces span graphs, so only the global limit applies
+                    async with admission.admit() as ticket:
+                        # Pick winning graphs off the event loop, then stream tagged steps
+                        winners = await asyncio.get_running_loop().run_in_executor(
+                            None, select_federated_graphs, question
+                        )
+                        await ws.send_text(json.dumps({"type": "reset"}))
+                        await ws.send_text(json.dumps({
+                            "type": "federated_graphs",
+                            "graphs": [
+                                {"graph_name": name, "best_score": candidates[0][1]}
+                                for name, _, candidates in winners
+                            ],
+                        }))
+                        for name, graph, candidates in winners:
+                            trace_id = uuid.uuid4().hex
+                            with use_coordinator(name, graph) as shards:
+                                run = _serving_traversal(name, graph, shards, traverse)
+                                events = run(question, graph=graph, start_candidates=candidates)
+                                async for event in _steps(events, shards is not None):
+                                    if trace_sink is not None:
+                                        trace_sink.record(trace_id, name, event)
+                                    await ws.send_text(json.dumps({
+                                        "type": "trace_step",
+                                        "graph_name": name,
+                                        **asdict(event),
+                                    }))
+                        await ws.send_text(json.dumps({"type": "done", **_timing(ticket)}))
+                    continue
+                
+                # Switch graph if requested
+                if graph_name:
+                    if set_active_graph(graph_name):
+                        await ws.send_text(json.dumps({
+                            "type": "graph_switched",
+                            "graph_name": graph_name
+                        }))
+                    else:
+                        await ws.send_text(json.dumps({
+                            "type": "error",
+                            "message": f"Graph '{graph_name}' not found"
+                        }))
+                        continue
+
+                # Get current graph
+                graph = get_graph()
+                active_name = get_active_graph_name()
+                
+                if incremental:
+                    if get_coordinator(active_name, graph) is not None or graph.graph.get("sharded"):
+                        # Token-delta scoring needs the whole graph in this process
+                        await ws.send_text(json.dumps({
+                            "type": "error",
+                            "message": f"Incremental traces are not available for sharded graph '{active_name}'"
+                        }))
+                        continue
+                    pending = asyncio.create_task(
+                        _incremental_trace(ws, session, question, graph, active_name, rate_bucket)
+                    )
+                    continue
+                
+                # Held until the trace ends, so a reshard can't close its workers mid-trace
+                with use_coordinator(active_name, graph) as shards:
+                    try:
+                        run = _serving_traversal(active_name, graph, shards, traverse)
+                    except ValueError as exc:
+                        await ws.send_text(json.dumps({"type": "error", "message": str(exc)}))
+                        continue
+                    
+                    async with admission.admit(active_name) as ticket:
+                        # You might send an event to clear the previous trace
+                        await ws.send_text(json.dumps({"type": "reset"}))
+
+                        # Stream trace events as we traverse
+                        trace_id = uuid.uuid4().hex
+                        async for event in _steps(run(question, graph=graph), shards is not None):
+                            if trace_sink is not None:
+                                trace_sink.record(trace_id, active_name, event)
+                            await ws.send_text(json.dumps({
+                                "type": "trace_step",
+                                **asdict(event),
+                            }))
+                        # Once done, you can send a "done" message
+                        await ws.send_text(json.dumps({"type": "done", **_timing(ticket)}))
+            except AdmissionRejected as exc:
+                await _send_rejection(ws, exc)
+            except ShardError as exc:
+                await ws.send_text(json.dumps({"type": "error", "message": str(exc)}))
 
     except WebSocketDisconnect:
         print("Client disconnected")
+    finally:
+        await _cancel(pending)
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # No reload=True: without watchfiles, uvicorn's stat reloader would restart the
+    # server on every graph source edit instead of letting the graph watcher hot-reload it
+    uvicorn.run("main:app", host="0.0.0.0", port=8000)
@@ -0,0 +1,155 @@
+"""
+Keyword relevance scoring and start-node selection for graph nodes.
+Kept free of server and graph-registry imports so shard and federation worker
+processes can score nodes without loading every graph.
+"""
+import os
+import re
+from typing import Dict, List, Tuple
+
+import networkx as nx
+
+from graph_priors import get_node_prior
+from trigram_index import fuzzy_node_scores
+
+# Weight of the static structural prior blended into keyword relevance
+PRIOR_WEIGHT = float(os.environ.get("RAGLM_PRIOR_WEIGHT", "1.0"))
+
+def question_keywords(question: str) -> List[str]:
+    """Keywords scored against node text, repeats included."""
+    return [k for k in re.findall(r'\b\w+\b', question.lower()) if len(k) >= 3]  # Skip very short words
+
+def node_text(node_id: str, node_data: dict) -> Tuple[str, str, str]:
+    """Lowercased label, description and id that keywords are matched against."""
+    return (
+        node_data.get("label", "").lower(),
+        node_data.get("description", "").lower(),
+        node_id.lower().replace("_", " "),
+    )
+
+def get_node_texts(graph: nx.DiGraph) -> Dict[str, Tuple[str, str, str]]:
+    """Lowercased node text for the graph's current version, cached on the graph."""
+    version = graph.graph.get("version", 0)
+    cached = graph.graph.get("node_texts")
+    if cached is None or cached[0] != version:
+        cached = (version, {node_id: node_text(node_id, data) for node_id, data in graph.nodes(data=True)})
+        graph.graph["node_texts"] = cached
+    return cached[1]
+
+def keyword_points(keyword: str, text: Tuple[str, str, str]) -> float:
+    """Points one keyword earns a node (label 2.0, description 1.0, id 1.5)."""
+    label, description, node_id_lower = text
+    score = 0.0
+    if keyword in label:
+        score += 2.0
+    if keyword in description:
+        score += 1.0
+    if keyword in node_id_lower:
+        score += 1.5
+    return score
+
+def score_node_relevance(node_id: str, question: str, graph: nx.DiGraph = None, prior_weight: float = None) -> float:
+    """Score how relevant a node is to the question.
+
+    Nodes with at least one keyword match get their static structural prior
+    added (scaled by prior_weight), so hubs win ties between similar matches.
+    """
+    if graph is None:
+        from graph_loader import get_graph
+        graph = get_graph()
+    
+    if node_id not in graph.nodes:
+        return 0.0
+    
+    # Extract text from node
+    text = node_text(node_id, graph.nodes[node_id])
+    
+    # Count keyword matches
+    score = sum(keyword_points(keyword, text) for keyword in question_keywords(question))
+    
+    if prior_weight is None:
+        prior_weight = PRIOR_WEIGHT
+    if score > 0 and prior_weight:
+        score += prior_weight * get_node_prior(node_id, graph)
+    
+    return score
+
+def blend_fuzzy_scores(question: str, graph: nx.DiGraph, node_scores: Dict[str, float],
+                       fuzzy_weight: float = None) -> Dict[str, float]:
+    """
+    Add typo-tolerant trigram matches to precomputed relevance scores.
+    Nodes found only this way still get their structural prior.
+    """
+    fuzzy = fuzzy_node_scores(question, graph, fuzzy_weight)
+    if not fuzzy:
+        return node_scores
+    blended = dict(node_scores)
+    for node_id, bonus in fuzzy.items():
+        base = blended.get(node_id, 0.0)
+        if base <= 0:
+            base = PRIOR_WEIGHT * get_node_prior(node_id, graph)
+        blended[node_id] = base + bonus
+    if len(blended) != len(node_scores):
+        # Sparse input gained nodes; restore graph order so ties break as usual
+        blended = {node_id: blended[node_id] for node_id in graph if node_id in blended}
+    return blended
+
+def find_start_nodes(question: str, max_candidates: int = 5, graph: nx.DiGraph = None,
+                     node_scores: Dict[str, float] = None, fuzzy_weight: float = None) -> List[Tuple[str, float]]:
+    """
+    Find the most relevant starting nodes based on keyword matching, plus
+    typo-tolerant matches from the graph's trigram index (scaled by fuzzy_weight).
+    
+    node_scores may supply precomputed relevance scores (in graph order) instead
+    of scoring every node here; graph is then only used to check fallbacks exist.
+    """
+    if graph is None:
+        from graph_loader import get_graph
+        graph = get_graph()
+    
+    q_lower = question.lower()
+    
+    # Score all nodes
+    if node_scores is None:
+        node_scores = {node_id: score_node_relevance(node_id, question, graph) for node_id in graph.nodes()}
+    node_scores = blend_fuzzy_scores(question, graph, node_scores, fuzzy_weight)
+    candidates = [(node_id, score) for node_id, score in node_scores.items() if score > 0]
+    
+    # Sort by score and return top candidates
+    candidates.sort(key=lambda x: x[1], reverse=True)
+    
+    # If no good matches, try some fallback patterns
+    if not candidates or candidates[0][1] < 0.5:
+        fallbacks = []
+        # Eating disorder patterns
+        if "anorexia" in q_lower or "restrict" in q_lower:
+            fallbacks.append(("anorexia_nervosa", 1.0))
+        if "bulimia" in q_lower or ("binge" in q_lower and "purge" in q_lower):
+            fallbacks.append(("bulimia_nervosa", 1.0))
+        if "treatment" in q_lower or "therapy" in q_lower or "cbt" in q_lower:
+            if "sepsis" not in q_lower:
+                fallbacks.append(("cbt_ed", 1.0))
+        if ("symptom" in q_lower or "sign" in q_lower) and "sepsis" not in q_lower:
+            fallbacks.append(("body_image_distortion", 0.8))
+        if "risk" in q_lower or "cause" in q_lower or "factor" in q_lower:
+            if "sepsis" not in q_lower:
+                fallbacks.append(("genetic_predisposition", 0.8))
+        # Sepsis patterns
+        if "sepsis" in q_lower or "septic" in q_lower:
+            fallbacks.append(("sepsis", 1.0))
+        if "sofa" in q_lower:
+            fallbacks.append(("sofa_score", 1.0))
+        if "qsofa" in q_lower or "quick sofa" in q_lower:
+            fallbacks.append(("qsofa_score", 1.0))
+        if "sirs" in q_lower:
+            fallbacks.append(("sirs_criteria", 1.0))
+        if "infection" in q_lower and "sepsis" in q_lower:
+            fallbacks.append(("infection", 0.9))
+        if "organ" in q_lower and "dysfunction" in q_lower:
+            fallbacks.append(("organ_dysfunction", 0.9))
+        # Fallbacks are shared across graphs; keep only nodes this graph has
+        fallbacks = [(node_id, score) for node_id, score in fallbacks if node_id in graph]
+        if fallbacks:
+            candidates = fallbacks + candidates
+    
+    return candidates[:max_candidates]
@@ -0,0 +1,368 @@
+"""
+Partitioned graph serving across local worker processes.
+
+A registered graph is split into shards, by node id hash or by community.
+The coordinator writes each shard's nodes (with their attributes and priors)
+and incident edges to its own file, and each worker process loads only that
+file. ShardCoordinator sends batched scoring and expansion requests to the
+workers over pipes and merges the replies so traverse_graph sees the same
+ordering as in-process. If a worker dies, all workers are restarted from
+their files on fresh pipes.
+
+Limit: graph sources are Python code that builds the whole graph, and priors
+(PageRank, betweenness) need the whole graph, so the serving process still
+holds one full copy while a graph is loaded or reloaded and sharded. It drops
+that copy once the workers are up (graph_loader.mark_sharded).
+"""
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import networkx as nx
+
+from scoring import blend_fuzzy_scores, score_node_relevance
+
+Neighbor = Tuple[str, str, Optional[str]]
+
+# Parent directory for per-shard files; the system temp directory if unset
+SHARD_DIR = os.environ.get("RAGLM_SHARD_DIR")
+
+class ShardError(RuntimeError):
+    """A shard worker died or its pipe was closed mid-request."""
+
+def partition_nodes(graph: nx.DiGraph, num_shards: int, strategy: str = "hash") -> Dict[str, int]:
+    """Map each node id to a shard index."""
+    if strategy == "hash":
+        # crc32 rather than hash() so placement is stable across processes
+        return {node_id: zlib.crc32(node_id.encode("utf-8")) % num_shards for node_id in graph}
+    if strategy == "community":
+        communities = nx.community.louvain_communities(graph.to_undirected(as_view=True), seed=0)
+        loads = [0] * num_shards
+        owner = {}
+        # Largest communities first, each onto the least-loaded shard
+        for community in sorted(communities, key=len, reverse=True):
+            shard = loads.index(min(loads))
+            loads[shard] += len(community)
+            for node_id in community:
+                owner[node_id] = shard
+        return owner
+    raise ValueError(f"Unknown partition strategy '{strategy}'")
+
+def _write_shard(path: str, graph: nx.DiGraph, owned: List[str]) -> None:
+    """Save one shard: its nodes with attributes and priors, and their edges."""
+    priors = graph.graph.get("node_priors", {})
+    shard = (
+        {node_id: dict(graph.nodes[node_id]) for node_id in owned},
+        {
+            node_id: [(t, "out", d.get("relation")) for _, t, d in graph.out_edges(node_id, data=True)]
+            for node_id in owned
+        },
+        {
+            node_id: [(s, "in", d.get("relation")) for s, _, d in graph.in_edges(node_id, data=True)]
+            for node_id in owned
+        },
+        {node_id: priors[node_id] for node_id in owned if node_id in priors},
+    )
+    with open(path, "wb") as f:
+        pickle.dump(shard, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _shard_worker(conn, path: str) -> None:
+    """Load one shard file, then serve requests until told to stop."""
+    with open(path, "rb") as f:
+        nodes, out_adj, in_adj, priors = pickle.load(f)
+    local = nx.DiGraph()
+    local.add_nodes_from(nodes.items())
+    local.graph["node_priors"] = priors
+    conn.send("ready")
+
+    while True:
+        try:
+            op, args = conn.recv()
+        except EOFError:
+            # The coordinator closed its end without a stop request
+            return
+        if op == "stop":
+            conn.close()
+            return
+        if op == "score":
+            question, node_ids = args
+            if node_ids is None:
+                # Full scan for start nodes, including fuzzy matches from this
+                # shard's trigram index; only matching nodes travel back
+                scores = blend_fuzzy_scores(
+                    question, local, {node_id: score_node_relevance(node_id, question, local) for node_id in local}
+                )
+                result = [
+                    (node_id, score, nodes[node_id].get("label", node_id))
+                    for node_id, score in scores.items() if score > 0
+                ]
+            else:
+                result = [
+                    (node_id, score_node_relevance(node_id, question, local), nodes[node_id].get("label", node_id))
+                    for node_id in node_ids
+                ]
+            conn.send(result)
+        elif op == "expand":
+            conn.send({node_id: out_adj[node_id] + in_adj[node_id] for node_id in args})
+        elif op == "labels":
+            conn.send({node_id: nodes[node_id].get("label", node_id) for node_id in args})
+        elif op == "dump":
+            conn.send((
+                [(node_id, data.get("label", node_id), data.get("type", "unknown")) for node_id, data in nodes.items()],
+                [(node_id, t, rel) for node_id, edges in out_adj.items() for t, _, rel in edges],
+            ))
+        else:
+            conn.send(None)
+
+class ShardCoordinator:
+    """
+    Front end for a graph split across worker processes.
+    Holds only node placement, order and a label cache; node attributes and
+    adjacency live in the workers and in their shard files. The graph passed
+    in is only read while the shard files are written and is not kept.
+    """
+
+    def __init__(self, graph: nx.DiGraph, num_shards: int = 2, strategy: str = "hash"):
+        self.num_shards = num_shards
+        self.strategy = strategy
+        self.graph_version = graph.graph.get("version", 0)
+        # Set by start_sharding; names the graph in failure notifications
+        self.graph_name: Optional[str] = None
+        self._owner = partition_nodes(graph, num_shards, strategy)
+        # Original node order, used to merge replies the way graph.nodes() iterates
+        self._order = {node_id: i for i, node_id in enumerate(graph)}
+        self._labels: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # Traces using this coordinator; a retired one closes when the last finishes
+        self._refs = 0
+        self._retired = False
+        self._closed = False
+        # Set when workers died and could not be restarted
+        self.broken = False
+        self.node_count = len(self._order)
+        self.edge_count = graph.number_of_edges()
+
+        self._dir = tempfile.mkdtemp(prefix="raglm-shards-", dir=SHARD_DIR)
+        self._paths = [os.path.join(self._dir, f"shard-{shard}.pickle") for shard in range(num_shards)]
+        for shard, path in enumerate(self._paths):
+            _write_shard(path, graph, [node_id for node_id in graph if self._owner[node_id] == shard])
+        self._conns = []
+        self._procs = []
+        try:
+            self._start_workers()
+        except ShardError:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            raise
+
+    def _start_workers(self) -> None:
+        """Start one worker per shard file and wait until each has loaded."""
+        ctx = multiprocessing.get_context("spawn")
+        for shard, path in enumerate(self._paths):
+            parent_conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(
+                target=_shard_worker,
+                args=(child_conn, path),
+                name=f"graph-shard-{shard}",
+                daemon=True,
+            )
+            proc.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._procs.append(proc)
+        try:
+            for conn in self._conns:
+                conn.recv()
+        except (EOFError, OSError) as exc:
+            self._kill_workers()
+            raise ShardError(f"Shard workers failed to start: {exc}") from exc
+
+    def _kill_workers(self) -> None:
+        for proc in self._procs:
+            proc.kill()
+            proc.join(timeout=5)
+        for conn in self._conns:
+            conn.close()
+        self._conns = []
+        self._procs = []
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._owner
+
+    def _round(self, requests: Dict[int, tuple]) -> Dict[int, object]:
+        """
+        Send one request per shard, then collect; shards work in parallel.
+        Raises ShardError if a worker fails. The workers are then restarted,
+        so the next round can succeed; if that fails too, the coordinator is
+        broken and unregistered.
+        """
+        with self._lock:
+            if self._closed or self.broken:
+                raise ShardError("Shard workers were shut down")
+            try:
+                for shard, request in requests.items():
+                    self._conns[shard].send(request)
+                return {shard: self._conns[shard].recv() for shard in requests}
+            except (EOFError, OSError) as exc:
+                error = exc
+            # Shards that did answer may still have replies queued on their pipes,
+            # so no pipe from this round is ever read again
+            self._kill_workers()
+            try:
+                self._start_workers()
+            except ShardError:
+                self.broken = True
+        if self.broken:
+            _unregister_broken(self)
+        raise ShardError(f"Shard worker unavailable: {error}") from error
+
+    def _by_shard(self, node_ids: Iterable[str]) -> Dict[int, List[str]]:
+        groups: Dict[int, List[str]] = {}
+        for node_id in node_ids:
+            if node_id in self._owner:
+                groups.setdefault(self._owner[node_id], []).append(node_id)
+        return groups
+
+    def score_nodes(self, question: str, node_ids: List[str] = None) -> Dict[str, float]:
+        """
+        Relevance scores in original graph order. With node_ids=None every node
+        is scored for start-node selection (fuzzy matches included) and only
+        those with a positive score are returned.
+        """
+        if node_ids is None:
+            replies = self._round({shard: ("score", (question, None)) for shard in range(self.num_shards)})
+        else:
+            replies = self._round({
+                shard: ("score", (question, ids)) for shard, ids in self._by_shard(node_ids).items()
+            })
+        rows = [row for reply in replies.values() for row in reply]
+        rows.sort(key=lambda row: self._order[row[0]])
+        for node_id, _, label in rows:
+            self._labels[node_id] = label
+        return {node_id: score for node_id, score, _ in rows}
+
+    def neighbors(self, node_ids: List[str]) -> Dict[str, List[Neighbor]]:
+        """Outgoing then incoming neighbors per node, as get_neighbors_bidirectional returns them."""
+        replies = self._round({shard: ("expand", ids) for shard, ids in self._by_shard(node_ids).items()})
+        merged = {}
+        for reply in replies.values():
+            merged.update(reply)
+        return merged
+
+    def label(self, node_id: str) -> str:
+        if node_id not in self._labels:
+            reply = self._round({self._owner[node_id]: ("labels", [node_id])})
+            self._labels.update(next(iter(reply.values())))
+        return self._labels[node_id]
+
+    def dump(self) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str, Optional[str]]]]:
+        """All (id, label, type) nodes and (source, target, relation) edges, in graph order."""
+        replies = self._round({shard: ("dump", None) for shard in range(self.num_shards)})
+        nodes = sorted((row for reply in replies.values() for row in reply[0]), key=lambda row: self._order[row[0]])
+        # Stable sort keeps each node's adjacency order
+        edges = sorted((row for reply in replies.values() for row in reply[1]), key=lambda row: self._order[row[0]])
+        return nodes, edges
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for conn in self._conns:
+                try:
+                    conn.send(("stop", None))
+                except OSError:
+                    pass
+                conn.close()
+            for proc in self._procs:
+                proc.join(timeout=5)
+            shutil.rmtree(self._dir, ignore_errors=True)
+
+# Coordinators for graphs currently served sharded, by graph name
+_coordinators: Dict[str, ShardCoordinator] = {}
+_registry_lock = threading.Lock()
+
+# Called as listener(graph_name) after a broken coordinator is unregistered
+_failure_listeners: List[Callable[[str], None]] = []
+
+def add_failure_listener(listener: Callable[[str], None]) -> None:
+    """Register a callback to restore a graph whose shard workers can't be restarted."""
+    _failure_listeners.append(listener)
+
+def _unregister_broken(coordinator: ShardCoordinator) -> None:
+    with _registry_lock:
+        registered = _coordinators.get(coordinator.graph_name) is coordinator
+        if registered:
+            del _coordinators[coordinator.graph_name]
+    _retire(coordinator)
+    if registered:
+        for listener in list(_failure_listeners):
+            listener(coordinator.graph_name)
+
+def _release(coordinator: ShardCoordinator) -> None:
+    with _registry_lock:
+        coordinator._refs -= 1
+        unused = coordinator._retired and coordinator._refs == 0
+    if unused:
+        coordinator.close()
+
+def _retire(coordinator: ShardCoordinator) -> None:
+    """Close now if idle, otherwise once the last trace using it releases it."""
+    with _registry_lock:
+        coordinator._retired = True
+        unused = coordinator._refs == 0
+    if unused:
+        coordinator.close()
+
+def start_sharding(graph_name: str, graph: nx.DiGraph, num_shards: int = 2,
+                   strategy: str = "hash") -> ShardCoordinator:
+    """Serve graph_name from worker processes, retiring any earlier coordinator."""
+    coordinator = ShardCoordinator(graph, num_shards, strategy)
+    coordinator.graph_name = graph_name
+    with _registry_lock:
+        previous = _coordinators.get(graph_name)
+        _coordinators[graph_name] = coordinator
+    if previous is not None:
+        _retire(previous)
+    return coordinator
+
+def get_coordinator(graph_name: str, graph: nx.DiGraph = None) -> Optional[ShardCoordinator]:
+    """
+    Coordinator for graph_name, or None if unsharded or built from another
+    version. Only for checks; traces should hold one via use_coordinator.
+    """
+    coordinator = _coordinators.get(graph_name)
+    if coordinator is None:
+        return None
+    if graph is not None and coordinator.graph_version != graph.graph.get("version", 0):
+        return None
+    return coordinator
+
+@contextmanager
+def use_coordinator(graph_name: str, graph: nx.DiGraph = None) -> Iterator[Optional[ShardCoordinator]]:
+    """
+    Like get_coordinator, but the coordinator stays open until the block
+    exits even if a reload replaces it meanwhile.
+    """
+    with _registry_lock:
+        coordinator = get_coordinator(graph_name, graph)
+        if coordinator is not None:
+            coordinator._refs += 1
+    try:
+        yield coordinator
+    finally:
+        if coordinator is not None:
+            _release(coordinator)
+
+def stop_sharding() -> None:
+    """Shut down every coordinator's workers."""
+    with _registry_lock:
+        coordinators = list(_coordinators.values())
+        _coordinators.clear()
+    for coordinator in coordinators:
+        coordinator.close()
@@ -0,0 +1,34 @@
+"""
+Incremental traces must match fresh traverse_graph traces keystroke by
+keystroke, including after backspaces.
+"""
+import pytest
+
+from graph_loader import get_graph, list_available_graphs
+from graph_priors import attach_node_priors
+from incremental import IncrementalSession
+from main import traverse_graph
+
+def keystrokes(question: str):
+    """Prefixes as typed, with a mistyped character erased every few keys."""
+    typed = ""
+    for i, char in enumerate(question):
+        if i % 5 == 4:
+            yield typed + "x"
+        typed += char
+        yield typed
+    # Then delete the last word again
+    for _ in range(len(question) - len(question.rstrip("?").rsplit(" ", 1)[0])):
+        typed = typed[:-1]
+        yield typed
+
+@pytest.mark.parametrize("graph_name", list_available_graphs())
+def test_incremental_matches_fresh_trace(graph_name, queries):
+    graph = get_graph(graph_name)
+    attach_node_priors(graph)
+    session = IncrementalSession()
+    for question in queries:
+        for typed in keystrokes(question):
+            node_scores = session.update(typed, graph)
+            incremental = list(traverse_graph(typed, graph=graph, node_scores=node_scores))
+            assert incremental == list(traverse_graph(typed, graph=graph)), typed
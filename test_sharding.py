@@ -0,0 +1,72 @@
+"""
+Traces served by a ShardCoordinator must match in-process traverse_graph
+traces for every partition strategy, including after a worker dies.
+"""
+import shutil
+
+import pytest
+
+import sharding
+from graph_loader import get_graph, list_available_graphs
+from graph_priors import attach_node_priors
+from main import traverse_graph
+from sharding import ShardCoordinator, ShardError, get_coordinator, start_sharding, stop_sharding
+
+# Misspellings exercise each worker's trigram index
+MISSPELLED = ["anorexya nervosa treatmnt", "sepssis with hypotenshun", "q sofa score"]
+
+def _sepsis():
+    graph = get_graph("sepsis")
+    attach_node_priors(graph)
+    return graph
+
+@pytest.mark.parametrize("strategy", ["hash", "community"])
+@pytest.mark.parametrize("graph_name", list_available_graphs())
+def test_sharded_traces_match_in_process(graph_name, strategy, queries):
+    graph = get_graph(graph_name)
+    # Shard files carry the priors, so both sides score alike
+    attach_node_priors(graph)
+    shards = ShardCoordinator(graph, num_shards=3, strategy=strategy)
+    try:
+        assert shards.node_count == graph.number_of_nodes()
+        assert shards.edge_count == graph.number_of_edges()
+        for question in queries + MISSPELLED:
+            expected = list(traverse_graph(question, graph=graph))
+            assert list(traverse_graph(question, graph=graph, shards=shards)) == expected, question
+    finally:
+        shards.close()
+
+def test_dead_worker_is_replaced():
+    graph = _sepsis()
+    question = "septic shock with low blood pressure"
+    expected = list(traverse_graph(question, graph=graph))
+    shards = ShardCoordinator(graph, num_shards=3)
+    try:
+        # The other shards answer this round before the dead one is noticed
+        shards._procs[2].kill()
+        shards._procs[2].join()
+        with pytest.raises(ShardError):
+            shards.score_nodes(question)
+        # Their unread replies must not turn up in later rounds
+        assert list(traverse_graph(question, graph=graph, shards=shards)) == expected
+    finally:
+        shards.close()
+
+def test_unrecoverable_coordinator_is_unregistered(monkeypatch):
+    failed = []
+    monkeypatch.setattr(sharding, "_failure_listeners", [failed.append])
+    coordinator = start_sharding("sepsis", _sepsis(), num_shards=2)
+    try:
+        # Without shard files the replacement workers can't start
+        shutil.rmtree(coordinator._dir)
+        coordinator._procs[0].kill()
+        coordinator._procs[0].join()
+        with pytest.raises(ShardError):
+            coordinator.score_nodes("sepsis")
+        assert coordinator.broken
+        assert get_coordinator("sepsis") is None
+        assert failed == ["sepsis"]
+        with pytest.raises(ShardError):
+            coordinator.score_nodes("sepsis")
+    finally:
+        stop_sharding()
@@ -0,0 +1,27 @@
+"""
+Typo-tolerant start-node matching: misspellings still find their nodes,
+without short-term false matches or double-counted keyword hits.
+"""
+from graph_loader import get_graph
+from graph_priors import attach_node_priors
+from scoring import find_start_nodes
+from trigram_index import max_distance_for
+
+def _start_nodes(question: str, graph_name: str):
+    graph = get_graph(graph_name)
+    attach_node_priors(graph)
+    return [node_id for node_id, _ in find_start_nodes(question, graph=graph)]
+
+def test_distance_bounded_by_shorter_term():
+    assert max_distance_for("relate") == 2
+    assert max_distance_for("relate", "rate") == 1
+    # "relate" is two edits from "rate"; it must not match heart/respiratory rate
+    assert _start_nodes("How do binge episodes relate to different eating disorders?", "sepsis") == []
+
+def test_keyword_hits_get_no_fuzzy_bonus():
+    # "recover" is a substring of "recovery" and within one edit of it
+    assert _start_nodes("Can people recover from anorexia?", "eating_disorder")[0] == "anorexia_nervosa"
+
+def test_misspellings_still_match():
+    assert _start_nodes("anorexya nervosa treatmnt", "eating_disorder")[0] == "anorexia_nervosa"
+    assert _start_nodes("q sofa score", "sepsis")[0] == "qsofa_score"
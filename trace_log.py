@@ -0,0 +1,171 @@
+"""
+Append-only, compressed trace log for offline analytics.
+
+TraceLogSink batches TraceEvents on a background thread and appends them to
+segment files as zlib-compressed column frames. TraceLogReader memory-maps the
+segments and aggregates over them (hot nodes, steps per trace, relation counts).
+
+Frame layout: MAGIC (4 bytes) | payload length (uint32 LE) | zlib(JSON columns)
+"""
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"RTL1"
+HEADER = struct.Struct("<4sI")
+SEGMENT_PREFIX = "trace-"
+SEGMENT_SUFFIX = ".log"
+
+# Columns stored per event; rationale text is left out since it is derivable
+COLUMNS = ("ts", "trace_id", "graph_name", "step", "node_id", "from_node_id",
+           "edge_relation", "score", "direction")
+
+def _segment_path(directory: str, seq: int) -> str:
+    return os.path.join(directory, f"{SEGMENT_PREFIX}{seq:08d}{SEGMENT_SUFFIX}")
+
+def list_segments(directory: str) -> List[str]:
+    """Segment files in write order."""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+    )
+    return [os.path.join(directory, name) for name in names]
+
+class TraceLogSink:
+    """
+    Asynchronous trace event sink.
+    record() only enqueues; if the queue is full the event is dropped and
+    counted rather than slowing down the trace.
+    """
+
+    def __init__(self, directory: str, batch_size: int = 512, flush_interval: float = 1.0,
+                 segment_bytes: int = 8 * 1024 * 1024, max_pending: int = 100000):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_pending)
+        os.makedirs(directory, exist_ok=True)
+
+        existing = list_segments(directory)
+        self._seq = 0
+        if existing:
+            self._seq = int(os.path.basename(existing[-1])[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            # Never append to an earlier run's segment: a torn tail frame left by a
+            # crash would hide everything written after it from the reader
+            if os.path.getsize(existing[-1]) > 0:
+                self._seq += 1
+        self._file = open(_segment_path(directory, self._seq), "ab")
+
+        self._thread = threading.Thread(target=self._run, name="trace-log", daemon=True)
+        self._thread.start()
+
+    def record(self, trace_id: str, graph_name: Optional[str], event) -> None:
+        """Queue one TraceEvent for writing."""
+        try:
+            self._queue.put_nowait((
+                time.time(), trace_id, graph_name, event.step, event.node_id,
+                event.from_node_id, event.edge_relation, event.score, event.direction,
+            ))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Flush pending events and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _run(self) -> None:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = ()
+            if item is None:
+                self._write(batch)
+                return
+            if item:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, batch: List[tuple]) -> None:
+        if not batch:
+            return
+        columns = {name: list(values) for name, values in zip(COLUMNS, zip(*batch))}
+        payload = zlib.compress(json.dumps(columns, separators=(",", ":")).encode("utf-8"))
+        self._file.write(HEADER.pack(MAGIC, len(payload)) + payload)
+        self._file.flush()
+        if self._file.tell() >= self.segment_bytes:
+            self._file.close()
+            self._seq += 1
+            self._file = open(_segment_path(self.directory, self._seq), "ab")
+
+class TraceLogReader:
+    """Read-only view over a trace log directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def iter_frames(self) -> Iterator[Dict[str, list]]:
+        """Yield each frame as a dict of columns."""
+        for path in list_segments(self.directory):
+            if os.path.getsize(path) == 0:
+                continue
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offset = 0
+                while offset + HEADER.size <= len(mm):
+                    magic, length = HEADER.unpack_from(mm, offset)
+                    start = offset + HEADER.size
+                    # Stop at a corrupt or partially written tail frame
+                    if magic != MAGIC or start + length > len(mm):
+                        break
+                    yield json.loads(zlib.decompress(mm[start:start + length]))
+                    offset = start + length
+
+    def iter_column(self, name: str) -> Iterator:
+        for frame in self.iter_frames():
+            yield from frame[name]
+
+    def hot_nodes(self, top_n: int = 20, graph_name: str = None) -> List[Tuple[str, int]]:
+        """Most frequently visited nodes."""
+        counts = Counter()
+        for frame in self.iter_frames():
+            if graph_name is None:
+                counts.update(frame["node_id"])
+            else:
+                counts.update(n for n, g in zip(frame["node_id"], frame["graph_name"]) if g == graph_name)
+        return counts.most_common(top_n)
+
+    def relation_frequency(self, graph_name: str = None) -> Dict[str, int]:
+        """How often each edge relation was followed (start steps excluded)."""
+        counts = Counter()
+        for frame in self.iter_frames():
+            for rel, g in zip(frame["edge_relation"], frame["graph_name"]):
+                if rel is not None and (graph_name is None or g == graph_name):
+                    counts[rel] += 1
+        return dict(counts.most_common())
+
+    def average_steps(self, graph_name: str = None) -> float:
+        """Mean number of steps per trace."""
+        steps = Counter()
+        for frame in self.iter_frames():
+            for trace_id, g in zip(frame["trace_id"], frame["graph_name"]):
+                if graph_name is None or g == graph_name:
+                    steps[trace_id] += 1
+        return sum(steps.values()) / len(steps) if steps else 0.0
@@ -0,0 +1,141 @@
+"""
+Character-trigram index over node labels and ids for typo-tolerant matching.
+Lookups only touch terms sharing trigrams with the query token, then confirm
+candidates with a bounded edit distance.
+"""
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+import networkx as nx
+
+# Weight of a fuzzy match relative to the keyword scores in score_node_relevance
+FUZZY_WEIGHT = float(os.environ.get("RAGLM_FUZZY_WEIGHT", "1.5"))
+
+# Tokens shorter than this are too ambiguous to correct
+MIN_FUZZY_LENGTH = 4
+
+_build_lock = threading.Lock()
+
+def trigrams(term: str) -> List[str]:
+    """Padded character trigrams, so short terms still produce a few."""
+    padded = f"$${term}$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, or max_distance + 1 as soon as it must exceed the bound."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+def max_distance_for(token: str, term: str = None) -> int:
+    """Edits allowed between token and term, bounded by the shorter of the two."""
+    length = len(token) if term is None else min(len(token), len(term))
+    return 1 if length <= 5 else 2
+
+class TrigramIndex:
+    """Maps label words, id parts and compacted ids/labels back to node ids."""
+
+    def __init__(self, graph: nx.DiGraph):
+        self.term_nodes: Dict[str, Set[str]] = {}
+        # Multi-word terms with spaces removed; keyword substring checks never see these
+        self.compact_terms: Set[str] = set()
+        for node_id, data in graph.nodes(data=True):
+            label_words = re.findall(r"\w+", data.get("label", "").lower())
+            id_parts = node_id.lower().split("_")
+            # Compacted forms let "q sofa" or "qsofascore" match "qSOFA Score"
+            compact = {"".join(words) for words in (id_parts, label_words) if len(words) > 1}
+            self.compact_terms |= compact
+            terms = set(label_words) | set(id_parts) | compact
+            for term in terms:
+                if len(term) >= 3:
+                    self.term_nodes.setdefault(term, set()).add(node_id)
+
+        self.terms = list(self.term_nodes)
+        self.gram_counts: List[int] = []
+        self.postings: Dict[str, List[int]] = {}
+        for i, term in enumerate(self.terms):
+            grams = set(trigrams(term))
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+
+    def lookup(self, token: str, max_distance: int = 1) -> List[Tuple[str, int]]:
+        """Indexed terms within max_distance edits of token, closest first."""
+        grams = set(trigrams(token))
+        shared = Counter()
+        for gram in grams:
+            for i in self.postings.get(gram, ()):
+                shared[i] += 1
+        matches = []
+        for i, count in shared.items():
+            term = self.terms[i]
+            # Each edit destroys at most 3 trigrams (q-gram count filter)
+            if count < max(len(grams), self.gram_counts[i]) - 3 * max_distance:
+                continue
+            distance = bounded_edit_distance(token, term, max_distance)
+            if distance <= max_distance:
+                matches.append((term, distance))
+        matches.sort(key=lambda m: (m[1], m[0]))
+        return matches
+
+def get_trigram_index(graph: nx.DiGraph) -> TrigramIndex:
+    """Index for the graph's current version, built on first use and then reused."""
+    version = graph.graph.get("version", 0)
+    cached = graph.graph.get("trigram_index")
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with _build_lock:
+        cached = graph.graph.get("trigram_index")
+        if cached is None or cached[0] != version:
+            cached = (version, TrigramIndex(graph))
+            graph.graph["trigram_index"] = cached
+    return cached[1]
+
+def fuzzy_node_scores(question: str, graph: nx.DiGraph, weight: float = None) -> Dict[str, float]:
+    """
+    Weighted fuzzy-match score per node for the question's tokens and adjacent
+    token pairs. Single tokens earn nothing on nodes whose text they already
+    match as keywords, so keyword scoring and fuzzy matching never both count
+    the same hit.
+    """
+    if weight is None:
+        weight = FUZZY_WEIGHT
+    if not weight:
+        return {}
+    # Deferred: scoring imports this module
+    from scoring import get_node_texts, keyword_points
+    index = get_trigram_index(graph)
+    texts = get_node_texts(graph)
+    tokens = re.findall(r"\w+", question.lower())
+    variants = [(t, False) for t in tokens] + [(a + b, True) for a, b in zip(tokens, tokens[1:])]
+
+    scores: Dict[str, float] = {}
+    for variant, joined in variants:
+        if len(variant) < MIN_FUZZY_LENGTH:
+            continue
+        k = max_distance_for(variant)
+        best: Dict[str, float] = {}
+        for term, distance in index.lookup(variant, k):
+            # "relate" is two edits from "rate", but that's too many for a 4-letter term
+            limit = max_distance_for(variant, term)
+            if distance > limit:
+                continue
+            strength = 1.0 - distance / (limit + 1)
+            for node_id in index.term_nodes[term]:
+                if not joined and keyword_points(variant, texts[node_id]):
+                    continue
+                best[node_id] = max(best.get(node_id, 0.0), strength)
+        for node_id, strength in best.items():
+            scores[node_id] = scores.get(node_id, 0.0) + weight * strength
+    return scores